@@ -1,7 +1,9 @@
 import streamlit as st
-import pandas as pd
-import hashlib
 import re
+import bisect
+from collections import defaultdict, namedtuple
+import numpy as np
+from horseshoe.helpers import highlight_text, load_theme_css, load_data
 
 # --- Page Configuration ---
 st.set_page_config(
@@ -9,6 +11,24 @@ st.set_page_config(
     layout="wide",
 )
 
+# --- Static HTML ---
+# Built once at import
+BACKGROUND_VIDEO_HTML = """
+    <div class="overlay"></div>
+    <video autoplay muted loop id="bg-video">
+        <source src="https://videos.pexels.com/video-files/2422488/2422488-hd_1920_1080_25fps.mp4" type="video/mp4">
+    </video>
+"""
+
+# Divider and credits in one sidebar element
+SIDEBAR_FOOTER_HTML = """
+---
+<div class="sidebar-footer">
+    <p>Developed by Utpal Mallick, ViStA Lab, BITS Pilani, Goa Campus.</p>
+    <p>Data sourced from The Lens, PoP software, Google Scholar, etc.</p>
+</div>
+"""
+
 # --- State Management ---
 # Initialize session state for various features
 if 'search_active' not in st.session_state:
@@ -16,103 +36,88 @@ if 'search_active' not in st.session_state:
 if 'current_page' not in st.session_state:
     st.session_state.current_page = 1
 
-# --- Helper Functions ---
-def get_pub_type_class(pub_type_string):
-    """Assigns a color class based on the publication type string for varied styling."""
-    if not isinstance(pub_type_string, str):
-        return "pub-type-default"
-    hash_object = hashlib.md5(pub_type_string.encode())
-    hash_dig = int(hash_object.hexdigest(), 16)
-    num_classes = 4 # We have 4 color styles defined in CSS
-    class_index = (hash_dig % num_classes) + 1
-    return f"pub-type-{class_index}"
-
-def highlight_text(text, query):
-    """Highlights the search query within a given text."""
-    if query and text:
-        # Use regex to find all occurrences of the query, case-insensitive
-        try:
-            return re.sub(f'({re.escape(query)})', r'<mark>\1</mark>', str(text), flags=re.IGNORECASE)
-        except re.error:
-            # Fallback for invalid regex patterns
-            return text
-    return text
-
 # --- Custom CSS ---
-st.markdown("""
-<style>
-    /* --- General & Background Video --- */
-    .stApp { background-color: #000; }
-    #bg-video { position: fixed; right: 0; bottom: 0; min-width: 100%; min-height: 100%; z-index: -1; }
-    .overlay { position: fixed; right: 0; bottom: 0; min-width: 100%; min-height: 100%; background-color: rgba(0, 0, 0, 0.7); z-index: -1; }
-    
-    /* --- Result Card Styling --- */
-    .result-container { background-color: #0d1b2a; border: 1px solid #415a77; border-radius: 8px; padding: 1.5rem; margin-bottom: 1rem; color: #e0e1dd; transition: transform 0.2s, box-shadow 0.2s; }
-    .result-container:hover { transform: translateY(-5px); box-shadow: 0 8px 16px rgba(0, 0, 0, 0.3); }
-    .result-title { font-size: 1.5rem; font-weight: 600; color: #ffffff; margin-bottom: 0.5rem; }
-    .result-meta { font-size: 1.0rem; color: #b0b3b8; margin-bottom: 0.5rem; }
-    .result-container .st-expander p { color: #e0e1dd !important; }
-
-    /* --- Publication Type Badge (Multiple Colors) --- */
-    .publication-type { display: inline-block; padding: 0.3em 0.7em; font-size: 0.8em; font-weight: 700; line-height: 1; text-align: center; white-space: nowrap; border-radius: 0.375rem; color: #ffffff; margin-bottom: 10px; }
-    .pub-type-1 { background-color: #0077b6; } .pub-type-2 { background-color: #e56b6f; } .pub-type-3 { background-color: #52b788; } .pub-type-4 { background-color: #f7b801; } .pub-type-default { background-color: #6c757d; }
-    
-    /* Highlight Style */
-    mark { background-color: #f7b801; color: black; border-radius: 3px; padding: 0 2px; }
-
-    /* Homepage Content Styling */
-    .homepage-content {
-        background-color: rgba(13, 27, 42, 0.85); /* Semi-transparent dark blue */
-        padding: 2rem;
-        border-radius: 10px;
-        color: #e0e1dd;
-        height: 100%;
-        border-left: 5px solid #415a77; /* Default border */
-    }
-    .card-1 { border-left-color: #0077b6; }
-    .card-2 { border-left-color: #e56b6f; }
-    .card-3 { border-left-color: #52b788; }
-    .card-4 { border-left-color: #f7b801; }
-
-    .homepage-content h2 {
-        color: #ffffff;
-        border-bottom: 2px solid #415a77;
-        padding-bottom: 0.5rem;
-    }
-    .homepage-content li {
-        margin-bottom: 0.5rem;
-    }
-</style>
-""", unsafe_allow_html=True)
+st.markdown(load_theme_css('dark_video'), unsafe_allow_html=True)
 
 # --- Background Video Player ---
 if 'page' not in st.session_state or st.session_state.page == 'Home':
-    st.markdown("""
-        <div class="overlay"></div>
-        <video autoplay muted loop id="bg-video">
-            <source src="https://videos.pexels.com/video-files/2422488/2422488-hd_1920_1080_25fps.mp4" type="video/mp4">
-        </video>
-    """, unsafe_allow_html=True)
+    st.markdown(BACKGROUND_VIDEO_HTML, unsafe_allow_html=True)
 
 # --- Data Loading ---
-@st.cache_data
-def load_data(file_path):
-    try:
-        df = pd.read_csv(file_path)
-        # Preprocessing: Fill missing values in key text columns to prevent errors during search
-        text_columns = ['Title', 'Author/s', 'Keywords', 'Abstract', 'Source Country', 'Publication Type']
-        for col in text_columns:
-            if col in df.columns:
-                df[col] = df[col].fillna('')
-        # Ensure 'Publication Year' is numeric for sorting/filtering
-        if 'Publication Year' in df.columns:
-            df['Publication Year'] = pd.to_numeric(df['Publication Year'], errors='coerce').fillna(0).astype(int)
-        return df
-    except FileNotFoundError:
-        st.error(f"Error: The file '{file_path}' was not found. Please make sure 'research_data.csv' is in the root directory.")
-        return None
-
-data = load_data('research_data.csv')
+# The frame, search index and sort orders are all loaded from this file
+DATA_FILE = 'research_data.csv'
+data = load_data(DATA_FILE)
+
+# Index tokens are runs of Unicode word characters, so names like 'thøgersen' stay whole
+TOKEN_PATTERN = re.compile(r'\w+')
+
+# Everything the search needs, derived once from the data and never mutated afterwards
+SearchIndex = namedtuple('SearchIndex', ['corpus', 'row_starts', 'token_index', 'vocabulary_suffixes'])
+
+@st.cache_resource
+def load_search_index(file_path):
+    """Joins every row's searchable text into one string and builds a token -> row positions index over it."""
+    df = load_data(file_path)
+    # One case-folded blob per row; \x1f between fields keeps a query from straddling two of them
+    blobs = (df['Title'] + '\x1f' + df['Author/s'] + '\x1f' + df['Keywords'] + '\x1f' + df['Abstract']).str.casefold().tolist()
+    # Rows are separated by the record separator (\x1e) in the joined corpus
+    row_starts = [0]
+    token_rows = defaultdict(list)
+    for row, blob in enumerate(blobs):
+        row_starts.append(row_starts[-1] + len(blob) + 1)
+        for token in set(TOKEN_PATTERN.findall(blob)):
+            token_rows[token].append(row)
+    # Rows are added in order, so each posting list is already sorted
+    token_index = {token: np.asarray(rows, dtype=np.int32) for token, rows in token_rows.items()}
+    # Every suffix of every token, sorted, so bisect finds all tokens containing a fragment
+    vocabulary_suffixes = sorted((token[i:], token) for token in token_index for i in range(len(token)))
+    return SearchIndex('\x1e'.join(blobs), row_starts, token_index, vocabulary_suffixes)
+
+def rows_with_token_containing(fragment, index):
+    """Returns the sorted positions of rows that have an indexed token containing the fragment."""
+    suffixes = index.vocabulary_suffixes
+    tokens = set()
+    i = bisect.bisect_left(suffixes, (fragment,))
+    while i < len(suffixes) and suffixes[i][0].startswith(fragment):
+        tokens.add(suffixes[i][1])
+        i += 1
+    if not tokens:
+        return np.array([], dtype=np.int32)
+    return np.unique(np.concatenate([index.token_index[token] for token in tokens]))
+
+# Cached per query and shared by every filter and sort combination
+@st.cache_data(max_entries=256, show_spinner=False)
+def find_matching_rows(query):
+    """Returns the positions of all rows whose search blob contains the (case-folded) query."""
+    index = load_search_index(DATA_FILE)
+    corpus, row_starts = index.corpus, index.row_starts
+    fragments = TOKEN_PATTERN.findall(query)
+    if fragments:
+        # A row can only match if it has a token containing every word of the query
+        candidates = None
+        # Longest (most selective) words first; one-letter words are left to the final check
+        for fragment in sorted(set(fragments), key=len, reverse=True):
+            if candidates is not None and len(fragment) == 1:
+                continue
+            rows = rows_with_token_containing(fragment, index)
+            candidates = rows if candidates is None else np.intersect1d(candidates, rows, assume_unique=True)
+            if len(candidates) == 0:
+                break
+        if TOKEN_PATTERN.fullmatch(query):
+            # A single-word query can only occur inside one token, so the candidates are exactly the matches
+            return candidates
+        # Otherwise confirm the full query (spaces, punctuation) against each candidate's slice of the corpus
+        return np.array([row for row in candidates if corpus.find(query, row_starts[row], row_starts[row + 1] - 1) != -1], dtype=np.int32)
+
+    # A query without any word characters (e.g. '()') falls back to a scan of the whole corpus
+    rows = []
+    start = corpus.find(query)
+    while start != -1:
+        # Map the hit to its row and resume the scan at the next row
+        row = bisect.bisect_right(row_starts, start) - 1
+        rows.append(row)
+        start = corpus.find(query, row_starts[row + 1])
+    return np.array(rows, dtype=np.int32)
 
 # --- Sidebar ---
 st.sidebar.title("🦀 Repository Menu")
@@ -128,16 +133,14 @@ if data is not None and page == "Search Repository":
     year_range = st.sidebar.slider("Publication Year Range", min_year, max_year, (min_year, max_year))
 
     # Publication Type Filter
-    pub_types = sorted(data['Publication Type'].unique().tolist())
+    pub_types = sorted(data['Publication Type'].cat.categories.tolist())
     selected_pub_types = st.sidebar.multiselect("Publication Type", pub_types, default=pub_types)
     
     # Country Filter
-    countries = sorted(data['Source Country'].unique().tolist())
+    countries = sorted(data['Source Country'].cat.categories.tolist())
     selected_countries = st.sidebar.multiselect("Source Country", countries, default=countries)
 
-st.sidebar.markdown("---")
-st.sidebar.caption("Developed by Utpal Mallick, ViStA Lab, BITS Pilani, Goa Campus.")
-st.sidebar.caption("Data sourced from The Lens, PoP software, Google Scholar, etc.")
+st.sidebar.markdown(SIDEBAR_FOOTER_HTML, unsafe_allow_html=True)
 
 # --- Page Functions ---
 def show_homepage():
@@ -193,6 +196,19 @@ def show_homepage():
         </div>
         """, unsafe_allow_html=True)
 
+# Dashboard aggregates, computed once
+@st.cache_data(show_spinner=False)
+def yearly_counts():
+    return data[data['Publication Year'] > 1900]['Publication Year'].value_counts().sort_index()
+
+@st.cache_data(show_spinner=False)
+def country_counts():
+    return data[data['Source Country'] != '']['Source Country'].value_counts().nlargest(10)
+
+@st.cache_data(show_spinner=False)
+def pub_type_counts():
+    return data[data['Publication Type'] != '']['Publication Type'].value_counts().nlargest(10)
+
 def show_dashboard_page():
     st.title("📊 Data Dashboard")
     st.write("Visualizing trends in the horseshoe crab research dataset.")
@@ -200,92 +216,159 @@ def show_dashboard_page():
     if data is not None:
         # Publications Over Time
         st.subheader("Publications Over Time")
-        yearly_counts = data[data['Publication Year'] > 1900]['Publication Year'].value_counts().sort_index()
-        st.bar_chart(yearly_counts)
+        st.bar_chart(yearly_counts())
 
         # Top Source Countries
         st.subheader("Top 10 Source Countries")
-        country_counts = data[data['Source Country'] != '']['Source Country'].value_counts().nlargest(10)
-        st.bar_chart(country_counts)
+        st.bar_chart(country_counts())
 
         # Publication Types
         st.subheader("Publication Type Distribution")
-        pub_type_counts = data[data['Publication Type'] != '']['Publication Type'].value_counts().nlargest(10)
-        st.bar_chart(pub_type_counts)
+        st.bar_chart(pub_type_counts())
+
+SORT_OPTIONS = ["Relevance", "Year (Newest First)", "Year (Oldest First)", "Title (A-Z)"]
+
+@st.cache_resource
+def load_sort_orders(file_path):
+    """Returns, for each non-relevance sort option, the permutation (int32 row positions) that sorts the whole frame."""
+    df = load_data(file_path)
+    years = df['Publication Year'].to_numpy()
+    # Stable sorts keep rows with equal keys in relevance (row) order
+    return {
+        "Year (Newest First)": np.argsort(-years.astype(np.int32), kind='stable').astype(np.int32),
+        "Year (Oldest First)": np.argsort(years, kind='stable').astype(np.int32),
+        "Title (A-Z)": df['Title'].argsort(kind='stable').to_numpy().astype(np.int32),
+    }
+
+# Streamlit reruns the script on every interaction; reruns that keep the query, filters and sort hit this cache
+@st.cache_data(max_entries=256, show_spinner=False)
+def search_and_sort(query, year_lo, year_hi, pub_types_key, countries_key, sort_option):
+    """Returns the positions of the rows matching the (case-folded) query and the filters, in display order.
+
+    pub_types_key / countries_key are tuples of the selected values, or None when that filter keeps everything.
+    """
+    # Filter data based on sidebar selections, matching the categorical columns on their integer codes
+    filter_mask = data['Publication Year'].between(year_lo, year_hi).to_numpy()
+    if pub_types_key is not None:
+        pub_type_codes = data['Publication Type'].cat.categories.get_indexer(list(pub_types_key))
+        filter_mask = filter_mask & np.isin(data['Publication Type'].cat.codes.to_numpy(), pub_type_codes)
+    if countries_key is not None:
+        country_codes = data['Source Country'].cat.categories.get_indexer(list(countries_key))
+        filter_mask = filter_mask & np.isin(data['Source Country'].cat.codes.to_numpy(), country_codes)
+
+    # Search title, authors, keywords and abstract, then keep only the matches that pass the filters
+    matching_rows = find_matching_rows(query)
+    row_ids = matching_rows[filter_mask[matching_rows]]
+
+    if sort_option != "Relevance":
+        # Keep the matched rows in the precomputed order; no per-query sort
+        order = load_sort_orders(DATA_FILE)[sort_option]
+        matched = np.zeros(len(data), dtype=bool)
+        matched[row_ids] = True
+        row_ids = order[matched[order]]
+    return row_ids
+
+# One HTML string per page, sent in a single st.markdown call and cached per (rows, query)
+@st.cache_data(max_entries=64, show_spinner=False)
+def render_result_cards(row_ids, search_query):
+    """Builds the result-card HTML for the given rows (positions in data), highlighting the query."""
+    # Walk the displayed columns as plain lists, without per-row Series or dicts
+    page = data.iloc[list(row_ids)]
+    display_columns = ['Publication Type', '_pub_class', 'Title', 'Author/s', 'Publication Year', 'Abstract']
+    cards = []
+    for pub_type, pub_class, title, authors, year, abstract in zip(*(page[col].tolist() for col in display_columns)):
+        title_html = highlight_text(title, search_query)
+        authors = highlight_text(authors, search_query)
+
+        abstract_html = ''
+        if abstract:
+            abstract_html = f'<details><summary>View Abstract</summary><div class="result-abstract">{highlight_text(abstract, search_query)}</div></details>'
+
+        cards.append(
+            f'<div class="result-container">'
+            f'<span class="publication-type {pub_class}">{pub_type}</span>'
+            f'<p class="result-title">{title_html}</p>'
+            f'<p class="result-meta">By: <strong>{authors}</strong> | Published in: <strong>{year}</strong></p>'
+            f'{abstract_html}'
+            f'</div>'
+        )
+    # A blank line would end the Markdown HTML block, so line breaks are flattened
+    return ''.join(cards).replace('\r', ' ').replace('\n', ' ')
+
+# Reruns that show the same results (paging, sorting back) reuse the encoded bytes
+@st.cache_data(max_entries=16, show_spinner=False)
+def results_csv(row_ids):
+    """Encodes the given rows (positions in data) as CSV bytes for download."""
+    results = data.iloc[row_ids]
+    # Internal helper columns (prefixed with '_') are left out of the export
+    return results.loc[:, ~results.columns.str.startswith('_')].to_csv(index=False).encode('utf-8')
+
+# Runs before the submit's rerun, so no extra st.rerun() is needed
+def _on_query_submit():
+    typed_query = st.session_state.search_bar
+    if typed_query != st.session_state.get('search_query', ''):
+        st.session_state.search_query = typed_query
+        # Fold the query once per submission; every rerun after that reuses it
+        st.session_state.search_query_folded = typed_query.casefold()
+        st.session_state.current_page = 1 # Reset to first page on new search
 
 def show_results_page():
     st.title("🔍 Search the Repository")
 
     def perform_search():
-        query = st.session_state.get('search_query', '').lower()
-        
-        # Filter data based on sidebar selections first
-        filtered_data = data[
-            (data['Publication Year'].between(year_range[0], year_range[1])) &
-            (data['Publication Type'].isin(selected_pub_types)) &
-            (data['Source Country'].isin(selected_countries))
-        ]
-
-        if query:
-            # Search across multiple columns on the already filtered data
-            results = filtered_data[
-                filtered_data['Title'].str.lower().str.contains(query, na=False) |
-                filtered_data['Author/s'].str.lower().str.contains(query, na=False) |
-                filtered_data['Keywords'].str.lower().str.contains(query, na=False) |
-                filtered_data['Abstract'].str.lower().str.contains(query, na=False)
-            ]
-            return results
-        return pd.DataFrame() # Return empty DataFrame if no search query
-
-    search_query = st.text_input("Search query", value=st.session_state.get('search_query', ''), key="search_bar", placeholder="Search by title, author, keyword, or abstract...")
-    if search_query != st.session_state.get('search_query', ''):
-        st.session_state.search_query = search_query
-        st.session_state.current_page = 1 # Reset to first page on new search
-        st.rerun()
-
-    results = perform_search()
+        query = st.session_state.get('search_query_folded', '')
+        if not query:
+            return np.array([], dtype=np.int32) # No rows if no search query
+
+        # A query containing an earlier zero-hit query can't match either
+        missed_queries = st.session_state.setdefault('missed_queries', set())
+        if any(missed in query for missed in missed_queries):
+            return np.array([], dtype=np.int32)
+        if len(find_matching_rows(query)) == 0:
+            missed_queries.add(query)
+            return np.array([], dtype=np.int32)
+
+        # A multiselect with everything selected filters nothing and is passed as None
+        pub_types_key = tuple(selected_pub_types) if len(selected_pub_types) != len(pub_types) else None
+        countries_key = tuple(selected_countries) if len(selected_countries) != len(countries) else None
+        return search_and_sort(query, year_range[0], year_range[1], pub_types_key, countries_key,
+                               st.session_state.get('sort_option', 'Relevance'))
+
+    # In a form, typing doesn't rerun the script; the search runs on submit
+    with st.form("search_form", clear_on_submit=False):
+        st.text_input("Search query", value=st.session_state.get('search_query', ''), key="search_bar", placeholder="Search by title, author, keyword, or abstract...")
+        st.form_submit_button("Search", on_click=_on_query_submit)
+    search_query = st.session_state.get('search_query', '')
+
+    # A single character matches almost every row, so don't scan (or render) anything for it
+    if len(search_query.strip()) == 1:
+        st.info("Type at least 2 characters to search.")
+        return
+
+    row_ids = perform_search()
     st.divider()
 
-    if not results.empty:
+    if len(row_ids):
         # --- Sorting ---
-        sort_option = st.selectbox("Sort results by", ["Relevance", "Year (Newest First)", "Year (Oldest First)", "Title (A-Z)"])
-        if sort_option == "Year (Newest First)": results = results.sort_values('Publication Year', ascending=False)
-        if sort_option == "Year (Oldest First)": results = results.sort_values('Publication Year', ascending=True)
-        if sort_option == "Title (A-Z)": results = results.sort_values('Title')
+        # perform_search reads the chosen order back from session state
+        st.selectbox("Sort results by", SORT_OPTIONS, key="sort_option")
 
         # --- Download Button ---
-        csv = results.to_csv(index=False).encode('utf-8')
-        st.download_button("📥 Download Results as CSV", data=csv, file_name="search_results.csv", mime="text/csv")
+        st.download_button("📥 Download Results as CSV", data=results_csv(row_ids), file_name="search_results.csv", mime="text/csv")
 
-        st.success(f"Found **{len(results)}** matching result(s).")
+        st.success(f"Found **{len(row_ids)}** matching result(s).")
         
         # --- Pagination ---
         results_per_page = 10
+        total_pages = (len(row_ids) - 1) // results_per_page + 1
+        # Narrowed filters can leave the page past the end, so clamp it
+        st.session_state.current_page = min(st.session_state.current_page, total_pages)
         start_index = (st.session_state.current_page - 1) * results_per_page
         end_index = start_index + results_per_page
-        paginated_results = results.iloc[start_index:end_index]
-        
-        for _, row in paginated_results.iterrows():
-            st.markdown('<div class="result-container">', unsafe_allow_html=True)
-            pub_type = row.get('Publication Type', '')
-            st.markdown(f'<span class="publication-type {get_pub_type_class(pub_type)}">{pub_type}</span>', unsafe_allow_html=True)
-            
-            title_html = highlight_text(row["Title"], search_query)
-            st.markdown(f'<p class="result-title">{title_html}</p>', unsafe_allow_html=True)
-            
-            authors = highlight_text(row.get('Author/s', 'N/A'), search_query)
-            year = row.get('Publication Year', 'N/A')
-            st.markdown(f'<p class="result-meta">By: <strong>{authors}</strong> | Published in: <strong>{year}</strong></p>', unsafe_allow_html=True)
-
-            abstract = row.get('Abstract', '')
-            if abstract and pd.notna(abstract):
-                with st.expander("View Abstract"):
-                    st.write(highlight_text(abstract, search_query), unsafe_allow_html=True)
-
-            st.markdown('</div>', unsafe_allow_html=True)
+        page_html = render_result_cards(tuple(row_ids[start_index:end_index].tolist()), st.session_state.get('search_query_folded', ''))
+        st.markdown(page_html, unsafe_allow_html=True)
 
         # Pagination controls
-        total_pages = (len(results) - 1) // results_per_page + 1
         if total_pages > 1:
             col1, col2, col3 = st.columns([1, 2, 1])
             with col1:
@@ -0,0 +1 @@
+"""Support code for the Horseshoe Crab Research Repository app."""
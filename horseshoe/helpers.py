@@ -0,0 +1,128 @@
+"""Helpers shared by the Streamlit app: badge colours, query highlighting, the theme stylesheet and data loading."""
+import streamlit as st
+import pandas as pd
+import zlib
+import re
+import bisect
+import os
+import tempfile
+from pathlib import Path
+from functools import lru_cache
+
+# --- Helper Functions ---
+def get_pub_type_class(pub_type_string):
+    """Assigns a color class based on the publication type string for varied styling."""
+    if not isinstance(pub_type_string, str):
+        return "pub-type-default"
+    return _hashed_pub_type_class(pub_type_string)
+
+# One hash per distinct type
+@lru_cache(maxsize=128)
+def _hashed_pub_type_class(pub_type_string):
+    # crc32, unlike the salted hash(), is stable across sessions
+    hash_dig = zlib.crc32(pub_type_string.encode())
+    num_classes = 4 # We have 4 color styles defined in CSS
+    class_index = (hash_dig % num_classes) + 1
+    return f"pub-type-{class_index}"
+
+def highlight_text(text, query):
+    """Highlights the search query within a given text, ignoring case the same way the search does (casefold)."""
+    if not query or not text:
+        return text
+    text = str(text)
+    folded_text, folded_query = text.casefold(), query.casefold()
+    # When a character folds to several (e.g. 'ß' -> 'ss'), hits are mapped back to whole original characters
+    starts = None
+    if len(folded_text) != len(text):
+        starts = [0]
+        for char in text:
+            starts.append(starts[-1] + len(char.casefold()))
+    # Matches are found in the folded copy; the output is sliced from the original to keep its case
+    parts = []
+    start = 0
+    hit = folded_text.find(folded_query)
+    while hit != -1:
+        end = hit + len(folded_query)
+        if starts is not None:
+            hit, end = bisect.bisect_right(starts, hit) - 1, bisect.bisect_left(starts, end)
+        parts += (text[start:hit], '<mark>', text[hit:end], '</mark>')
+        start = end
+        hit = folded_text.find(folded_query, end if starts is None else starts[end])
+    parts.append(text[start:])
+    return ''.join(parts)
+
+# --- Custom CSS ---
+# The themes folder sits next to app.py, one level above this package
+THEMES_DIR = Path(__file__).resolve().parent.parent / 'themes'
+
+# Minified once, since Streamlit re-sends the stylesheet on every rerun
+@st.cache_data
+def load_theme_css(theme):
+    """Reads a stylesheet from the themes folder, minified and wrapped in a <style> tag ready for st.markdown."""
+    css = (THEMES_DIR / f'{theme}.css').read_text(encoding='utf-8')
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.DOTALL)
+    css = re.sub(r'\s+', ' ', css)
+    css = re.sub(r'\s*([{};,])\s*', r'\1', css).strip()
+    return f"<style>{css}</style>"
+
+# --- Data Loading ---
+# Arrow-backed text columns; 'Publication Year' has non-numeric entries, so load_data converts it
+CSV_DTYPES = {'Title': 'string[pyarrow]', 'Author/s': 'string[pyarrow]', 'Keywords': 'string[pyarrow]',
+              'Abstract': 'string[pyarrow]', 'Publication Year': 'str',
+              'Publication Type': 'category', 'Source Country': 'category'}
+
+# Bump when load_data's preprocessing changes
+PARQUET_CACHE_VERSION = 1
+
+def is_preprocessed(df):
+    """Checks that a frame has the columns and dtypes load_data's preprocessing produces."""
+    return ('_pub_class' in df.columns and df['Publication Year'].dtype == 'int16'
+            and all(isinstance(df[col].dtype, pd.CategoricalDtype) for col in ['Publication Type', 'Source Country']))
+
+# cache_resource shares one frame by reference across reruns and sessions, so it must be treated as read-only
+@st.cache_resource
+def load_data(file_path):
+    try:
+        # Prefer the preprocessed Parquet copy written below, unless the CSV has been edited since
+        parquet_path = f"{os.path.splitext(file_path)[0]}.v{PARQUET_CACHE_VERSION}.parquet"
+        if os.path.exists(parquet_path) and os.path.getmtime(parquet_path) >= os.path.getmtime(file_path):
+            try:
+                df = pd.read_parquet(parquet_path, engine='pyarrow')
+            except Exception:
+                df = None # An unreadable (e.g. truncated) cache is rebuilt from the CSV below
+            # Parquet keeps the dtypes and derived columns
+            if df is not None and is_preprocessed(df):
+                return df
+        # keep_default_na=False reads empty cells as ''; declared dtypes skip inference
+        df = pd.read_csv(file_path, keep_default_na=False, dtype=CSV_DTYPES, engine='pyarrow')
+        # Preprocessing: Fill missing values in key text columns to prevent errors during search
+        text_columns = ['Title', 'Author/s', 'Keywords', 'Abstract', 'Source Country', 'Publication Type']
+        for col in text_columns:
+            if col in df.columns and df[col].hasnans:
+                df[col] = df[col].fillna('')
+        # Categories let the sidebar filters compare integer codes
+        for col in ['Publication Type', 'Source Country']:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+        # Badge colour class per row, resolved once
+        if 'Publication Type' in df.columns:
+            df['_pub_class'] = df['Publication Type'].map(get_pub_type_class)
+        # Ensure 'Publication Year' is numeric for sorting/filtering
+        if 'Publication Year' in df.columns:
+            df['Publication Year'] = pd.to_numeric(df['Publication Year'], errors='coerce').fillna(0).astype('int16')
+        # Cache the preprocessed frame, via a temp file moved into place so it is never left partial
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix=os.path.basename(parquet_path), suffix='.tmp',
+                                            dir=os.path.dirname(parquet_path) or '.')
+            with os.fdopen(fd, 'wb') as tmp_file:
+                df.to_parquet(tmp_file, engine='pyarrow', index=False)
+            os.chmod(tmp_path, 0o644) # mkstemp creates the file private to this user
+            os.replace(tmp_path, parquet_path)
+        except OSError: # e.g. a read-only deployment, which just keeps loading the CSV
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        return df
+    except FileNotFoundError:
+        st.error(f"Error: The file '{file_path}' was not found. Please make sure it is in the root directory.")
+        return None